@@ -1,6 +1,9 @@
+from flask import Flask, make_response
 from flask_restful import Api
 from blacklist import BLACKLIST
+from db import db
 import jwt_utils
+import orjson
 from resources.user import User, UserList, UserCreate, UserLogin, UserLogout, UserChangePassword
 from resources.maintenance_activity import MaintenanceActivity, MaintenanceActivityCreate, MaintenanceActivityList, MaintenanceActivityAssign
 from resources.maintainer_availability import MaintainerWeeklyAvailabilityList, MaintainerDailyAvailability
@@ -8,12 +11,31 @@ from flask_seeder import FlaskSeeder
 
 
 def create_app(config_class="config.Config"):
-    from flask import Flask
     app = Flask(__name__)
     app.config.from_object(config_class)
     jwt_utils.bind_jwt_messages(app)
     api = Api(app)
 
+    @api.representation("application/json")
+    def output_json(data, code, headers=None):
+        """Serializes API responses with orjson instead of the stdlib json module.
+
+        Args:
+            data: The object to serialize
+            code (int): The HTTP status code for the response
+            headers (dict, optional): Extra headers for the response
+
+        Returns:
+            Response: The json response
+        """
+        # OPT_NON_STR_KEYS matches the stdlib behavior of coercing the
+        # integer hour keys of the daily agenda to strings
+        response = make_response(
+            orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), code)
+        response.headers.extend(headers or {})
+        response.headers["Content-Type"] = "application/json"
+        return response
+
     api.add_resource(User, "/user/<string:username>")
     api.add_resource(UserCreate, "/user")
     api.add_resource(UserList, "/users")
@@ -30,7 +52,6 @@ def create_app(config_class="config.Config"):
     api.add_resource(MaintenanceActivityAssign,
                      "/activity/<int:id>/assign")
 
-    from db import db
     db.init_app(app)
     seeder = FlaskSeeder()
     seeder.init_app(app, db)
@@ -40,8 +61,6 @@ def create_app(config_class="config.Config"):
 if __name__ == "__main__":
     app = create_app('config.Config')
 
-    from db import db
-
     @app.before_first_request
     def create_tables():
         db.create_all()
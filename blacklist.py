@@ -1,2 +1,49 @@
-# A set in memory which contains jwt id for jwt revoked tokens
-BLACKLIST = set()
+from time import time
+from config import JWT_TOKEN_EXPIRES, REDIS_URL
+
+
+class Blacklist:
+    """Revoked-token store for jwt ids, since a jwt token cannot be forced to expire.
+
+    When REDIS_URL is configured the jtis are stored in Redis with an expiry
+    matching the token's own, so revocation state survives restarts, is shared
+    across workers and is evicted automatically. Without Redis it falls back
+    to an in-process dictionary with the same expiry semantics.
+    """
+    _PREFIX = "blacklist:"
+
+    def __init__(self, redis_url=REDIS_URL):
+        self._redis = None
+        self._local = {}
+        if redis_url:
+            from redis import Redis
+            self._redis = Redis.from_url(redis_url)
+
+    def add(self, jti, exp_ts=None):
+        """Revokes the token with given jwt id until it would have expired anyway
+
+        Args:
+            jti (str): The unique identifier of the jwt token to revoke
+            exp_ts (int, optional): The token's expiry unix timestamp. Defaults to the configured token lifetime from now.
+        """
+        ttl = max(1, int((exp_ts or time() + JWT_TOKEN_EXPIRES) - time()))
+        if self._redis:
+            self._redis.setex(self._PREFIX + jti, ttl, 1)
+        else:
+            self._purge_expired()
+            self._local[jti] = time() + ttl
+
+    def __contains__(self, jti):
+        if self._redis:
+            return bool(self._redis.exists(self._PREFIX + jti))
+        expiry = self._local.get(jti)
+        return expiry is not None and expiry > time()
+
+    def _purge_expired(self):
+        """Drops expired local entries so the fallback store stays bounded"""
+        now = time()
+        for jti in [jti for jti, expiry in self._local.items() if expiry <= now]:
+            del self._local[jti]
+
+
+BLACKLIST = Blacklist()
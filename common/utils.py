@@ -1,15 +1,52 @@
-def get_metadata(pagination):
-    """Gets formatted metadata from pagination object in order to allow the frontend to handle pages properly
+from flask import abort
+from sqlalchemy import func
+from math import ceil
+
+
+def get_metadata(total, current_page, page_size):
+    """Gets formatted metadata from pagination values in order to allow the frontend to handle pages properly
 
     Args:
-        pagination (Pagination): Pagination object generated from query builders in models methods
+        total (int): Total number of rows matched by the query
+        current_page (int): The requested page number, starting from 1
+        page_size (int): The requested page size
 
     Returns:
         dict of (str, int): Metadata
     """
     return {
-        "count": pagination.total,
-        "current_page": pagination.page,
-        "page_count": pagination.pages,
-        "page_size": pagination.per_page
+        "count": total,
+        "current_page": current_page,
+        "page_count": ceil(total / page_size) if page_size else 0,
+        "page_size": page_size
     }
+
+
+def paginate(query, count_column, current_page=1, page_size=10):
+    """Paginates the given query in a single database round-trip by attaching
+    the total row count as a window-function column to the paginated rows.
+    Fails if current_page does not exist or page_size is negative.
+
+    Args:
+        query (Query): Query builder generated in models methods
+        count_column (Column): The column to count rows on, usually the model's primary key
+        current_page (int, optional): The desired page number, starting from 1. Defaults to 1.
+        page_size (int, optional): The desired page size. Defaults to 10.
+
+    Returns:
+        ( list of (db.Model), dict of (str, int) ):
+        The first tuple element is a list of paginated model instances;
+        The second tuple element is the pagination metadata;
+    """
+    if current_page < 1 or page_size < 0:
+        abort(404)
+    results = (query
+               .add_columns(func.count(count_column).over().label("_total"))
+               .offset(page_size*(current_page-1))
+               .limit(page_size)
+               .all())
+    if not results and current_page != 1:
+        abort(404)
+    total = results[0][-1] if results else 0
+    rows = [result[0] for result in results]
+    return rows, get_metadata(total, current_page, page_size)
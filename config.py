@@ -10,18 +10,29 @@ load_dotenv(dotenv_path=env_path)
 
 # The main database url
 DB_URL = getenv("DATABASE_URL", 'sqlite:///data.db')
-# The test database url
-TEST_DB_URL = getenv("TEST_DATABASE_URL", 'sqlite:///data.db')
+# The test database url; in-memory by default so tests never touch the disk
+TEST_DB_URL = getenv("TEST_DATABASE_URL", 'sqlite:///:memory:')
 TESTING = getenv("TESTING") == "TRUE"
 ENVIRONMENT = "development" if getenv(
     "DEVELOPMENT") == "TRUE" else "production"
 JWT_SECRET_KEY = getenv("JWT_SECRET_KEY")
 JWT_TOKEN_EXPIRES = int(getenv("JWT_TOKEN_EXPIRES", "3600"))
+# Signing algorithm for access tokens. HS256 (a single HMAC per verify) is
+# the cheapest option for a service that verifies its own tokens; asymmetric
+# algorithms can be enabled by providing the key pair below
+JWT_ALGORITHM = getenv("JWT_ALGORITHM", "HS256")
+JWT_PRIVATE_KEY = getenv("JWT_PRIVATE_KEY")
+JWT_PUBLIC_KEY = getenv("JWT_PUBLIC_KEY")
+# Optional Redis url backing the token blacklist across workers
+REDIS_URL = getenv("REDIS_URL")
 
 # Configurable maintainer constants
 MAINTAINER_WORK_START_HOUR = int(getenv("MAINTAINER_WORK_START_HOUR", "8"))
 MAINTAINER_WORK_HOURS = int(getenv("MAINTAINER_WORK_HOURS", "9"))
 
+# bcrypt work factor for password hashing, tuned to roughly 50ms per hash
+BCRYPT_LOG_ROUNDS = int(getenv("BCRYPT_LOG_ROUNDS", "12"))
+
 
 class Config:
     """Flask Config class."""
@@ -36,6 +47,11 @@ class Config:
     JWT_BLACKLIST_TOKEN_CHECKS = ["access"]
     # secret key to check jwt validity
     JWT_SECRET_KEY = JWT_SECRET_KEY
+    # algorithm used to sign and verify jwt tokens
+    JWT_ALGORITHM = JWT_ALGORITHM
+    # key pair for asymmetric jwt algorithms, unused with HS256
+    JWT_PRIVATE_KEY = JWT_PRIVATE_KEY
+    JWT_PUBLIC_KEY = JWT_PUBLIC_KEY
     # token expire time in seconds
     JWT_ACCESS_TOKEN_EXPIRES = JWT_TOKEN_EXPIRES
 
@@ -49,8 +65,25 @@ class TestConfig(Config):
     """Flask TestConfig class."""
     SQLALCHEMY_DATABASE_URI = TEST_DB_URL
 
+    if TEST_DB_URL.startswith("sqlite"):
+        # Share the single in-memory SQLite connection across threads and
+        # keep it alive for the whole session so the schema persists
+        # between requests
+        from sqlalchemy.pool import StaticPool
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            "poolclass": StaticPool,
+            "connect_args": {"check_same_thread": False},
+        }
+
     # silence the deprecation warning
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # never log statements while testing, whatever the environment says
+    SQLALCHEMY_ECHO = False
+
+    # sign test tokens with plain HMAC and a fixed key, so tests never
+    # depend on the environment nor pay for asymmetric crypto
+    JWT_ALGORITHM = "HS256"
+    JWT_SECRET_KEY = "x" * 32
 
     # Enable testing mode. Exceptions are propagated rather than handled by the the app’s error handlers.
     TESTING = True
@@ -1,6 +1,17 @@
-from flask import jsonify
+from hashlib import sha256
+from time import time
+from cachetools import TTLCache
+from flask import jsonify, request
+from flask import _app_ctx_stack as ctx_stack
 from blacklist import BLACKLIST
-from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_claims
+from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_claims, get_raw_jwt
+from flask_jwt_extended.exceptions import RevokedTokenError
+
+# Verified token payloads keyed by the sha256 of the Authorization header.
+# A JWT is immutable for its lifetime, so a token that verified once needs no
+# further signature checks; the short TTL merely bounds the cache staleness
+# while expiry and revocation are still enforced on every hit.
+_verified_tokens = TTLCache(maxsize=10000, ttl=60)
 
 
 def bind_jwt_messages(app):
@@ -56,6 +67,26 @@ def bind_jwt_messages(app):
     return jwt
 
 
+def _verify_jwt_in_request_cached():
+    """Verifies the JWT present in the request, skipping the signature
+        verification when the same token has already been verified recently.
+        Expiry and revocation are checked on cached tokens as well.
+
+    Raises:
+        RevokedTokenError: If the cached token has been revoked
+    """
+    authorization_header = request.headers.get("Authorization", "")
+    cache_key = sha256(authorization_header.encode()).digest()
+    decoded_token = _verified_tokens.get(cache_key)
+    if decoded_token is not None and decoded_token["exp"] > time():
+        if decoded_token["jti"] in BLACKLIST:
+            raise RevokedTokenError("Token has been revoked")
+        ctx_stack.top.jwt = decoded_token
+        return
+    verify_jwt_in_request()
+    _verified_tokens[cache_key] = get_raw_jwt()
+
+
 def role_required(role="admin"):
     """Custom decorator factory that produces a decorator that verifies if
         the JWT is present in the request, as well as insuring that this
@@ -63,7 +94,7 @@ def role_required(role="admin"):
     """
     def decorator(fn):
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
+            _verify_jwt_in_request_cached()
             claims = get_jwt_claims()
             if claims['role'] != role:
                 return {"error": "role_mismatch", "message": f"Wanted '{role}', but got '{claims['role']}'."}, 403
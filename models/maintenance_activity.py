@@ -1,7 +1,11 @@
 from db import db
-from common.utils import get_metadata
+from common.utils import paginate
 from config import MAINTAINER_WORK_HOURS, MAINTAINER_WORK_START_HOUR
-from functools import reduce
+
+# Placeholder skills shared by every activity; built once at import time
+# instead of being re-allocated on every json() call
+_SKILLS_NEEDED = ("PAV certification", "Electrical Maintenance", "Knowledge of cable types",
+                  "XYZ-type robot knowledge", "Knowledge of robot workstation 23")
 
 
 class MaintenanceActivityModel(db.Model):
@@ -28,7 +32,16 @@ class MaintenanceActivityModel(db.Model):
     maintainer_username = db.Column(db.String(128),
                                     db.ForeignKey("users.username"),
                                     nullable=True)
-    maintainer = db.relationship("UserModel")
+    # Lazy loading would silently issue one SELECT per activity when the
+    # relationship is touched in a loop; queries that actually need the
+    # maintainer must opt in with db.joinedload / db.selectinload options
+    maintainer = db.relationship("UserModel", lazy="raise")
+
+    __table_args__ = (
+        db.Index("ix_ma_user_week_day", "maintainer_username", "week", "week_day"),
+        db.Index("ix_ma_week_day", "week", "week_day"),
+        db.Index("ix_ma_week", "week"),
+    )
 
     def __init__(self, activity_type, site, typology, description, estimated_time,
                  interruptible, week, materials=None, workspace_notes=None, activity_id=None):
@@ -74,8 +87,7 @@ class MaintenanceActivityModel(db.Model):
             "materials": self.materials,
             "week": self.week,
             "workspace_notes": self.workspace_notes,
-            "skills_needed": ["PAV certification", "Electrical Maintenance", "Knowledge of cable types",
-                              "XYZ-type robot knowledge", "Knowledge of robot workstation 23"]
+            "skills_needed": _SKILLS_NEEDED
         }
 
     def save_to_db(self):
@@ -85,11 +97,13 @@ class MaintenanceActivityModel(db.Model):
 
     def update(self, data):
         """Updates activity with passed data.
+        Ignores keys that are not mutable columns and values that are None.
         Args:
             data (dict of (str, str)): Dictionary of activity's new attributes.
         """
-        for k in data:
-            setattr(self, k, data[k])
+        for k, v in data.items():
+            if k in self._MUTABLE_COLUMNS and v is not None:
+                setattr(self, k, v)
 
     def update_and_save(self, data):
         """Updates MaintenanceActivityModel instance with passed data and saves it to the database. 
@@ -113,7 +127,7 @@ class MaintenanceActivityModel(db.Model):
         Returns:
             MaintenanceActivityModel: The found activity
         """
-        return cls.query.filter_by(activity_id=activity_id).first()
+        return db.session.get(cls, activity_id)
 
     @classmethod
     def find_all(cls):
@@ -137,13 +151,7 @@ class MaintenanceActivityModel(db.Model):
             The first tuple element is a list of paginated MaintenanceActivityModel instances; 
             The second tuple element is the pagination metadata;
             """
-        rows = cls.query.offset(
-            page_size*(current_page-1)).limit(page_size).all()
-
-        meta = get_metadata(
-            cls.query.paginate(page=current_page, per_page=page_size)
-        )
-        return rows, meta
+        return paginate(cls.query, cls.activity_id, current_page, page_size)
 
     @classmethod
     def find_all_in_day(cls, week, week_day):
@@ -156,7 +164,7 @@ class MaintenanceActivityModel(db.Model):
         Returns:
             list of (MaintenanceActivityModel): List of found Maintenance Activities
         """
-        return cls.query.filter_by(week=week).filter_by(week_day=week_day).all()
+        return cls.query.filter_by(week=week, week_day=week_day).all()
 
     @classmethod
     def find_some_in_day(cls, week, week_day, current_page=1, page_size=10):
@@ -174,20 +182,8 @@ class MaintenanceActivityModel(db.Model):
             The first tuple element is a list of paginated MaintenanceActivityModel instances; 
             The second tuple element is the pagination metadata;
         """
-        rows = (cls.query
-                .filter_by(week=week)
-                .filter_by(week_day=week_day)
-                .offset(page_size*(current_page-1))
-                .limit(page_size)
-                .all())
-
-        meta = get_metadata(
-            cls.query
-            .filter_by(week=week)
-            .filter_by(week_day=week_day)
-            .paginate(page=current_page, per_page=page_size)
-        )
-        return rows, meta
+        return paginate(cls.query.filter_by(week=week, week_day=week_day),
+                        cls.activity_id, current_page, page_size)
 
     @classmethod
     def find_all_in_day_for_user(cls, username, week, week_day, exclude=None):
@@ -202,12 +198,11 @@ class MaintenanceActivityModel(db.Model):
         Returns:
             list of (MaintenanceActivityModel): List of found Maintenance Activities
         """
-        activities = cls.query.filter_by(maintainer_username=username).filter_by(
-            week=week).filter_by(week_day=week_day).all()
+        query = cls.query.filter_by(
+            maintainer_username=username, week=week, week_day=week_day)
         if exclude:
-            activities = list(
-                filter(lambda activity: activity.activity_id != exclude, activities))
-        return activities
+            query = query.filter(cls.activity_id != exclude)
+        return query.all()
 
     @classmethod
     def find_some_in_day_for_user(cls, username, week, week_day, current_page=1, page_size=10):
@@ -227,22 +222,10 @@ class MaintenanceActivityModel(db.Model):
             The first tuple element is a list of paginated MaintenanceActivityModel instances; 
             The second tuple element is the pagination metadata;
         """
-        rows = (cls.query
-                .filter_by(maintainer_username=username)
-                .filter_by(week=week)
-                .filter_by(week_day=week_day)
-                .offset(page_size*(current_page-1))
-                .limit(page_size)
-                .all())
-
-        meta = get_metadata(
-            cls.query
-            .filter_by(maintainer_username=username)
-            .filter_by(week=week)
-            .filter_by(week_day=week_day)
-            .paginate(page=current_page, per_page=page_size)
-        )
-        return rows, meta
+        return paginate(
+            cls.query.filter_by(
+                maintainer_username=username, week=week, week_day=week_day),
+            cls.activity_id, current_page, page_size)
 
     @classmethod
     def find_all_in_week(cls, week):
@@ -256,6 +239,24 @@ class MaintenanceActivityModel(db.Model):
         """
         return cls.query.filter_by(week=week).all()
 
+    @classmethod
+    def stream_all_in_week(cls, week, chunk=500):
+        """Streams every Maintenance Activity for a given week in chunks,
+        keeping at most chunk activities in memory at a time.
+        Useful for callers that only iterate over the result.
+
+        Args:
+            week (int): The nth week of the year
+            chunk (int, optional): The number of activities fetched per batch. Defaults to 500.
+
+        Returns:
+            iterator of (MaintenanceActivityModel): Iterator over the found Maintenance Activities
+        """
+        return (cls.query
+                .filter_by(week=week)
+                .execution_options(stream_results=True)
+                .yield_per(chunk))
+
     @classmethod
     def find_some_in_week(cls, week, current_page=1, page_size=10):
         """Finds the selected page of Maintenance Activitis for a given week by means of given current_page and page_size.
@@ -271,18 +272,30 @@ class MaintenanceActivityModel(db.Model):
             The first tuple element is a list of paginated MaintenanceActivityModel instances; 
             The second tuple element is the pagination metadata;
         """
-        rows = (cls.query
-                .filter_by(week=week)
-                .offset(page_size*(current_page-1))
-                .limit(page_size)
-                .all())
+        return paginate(cls.query.filter_by(week=week),
+                        cls.activity_id, current_page, page_size)
 
-        meta = get_metadata(
-            cls.query
-            .filter_by(week=week)
-            .paginate(page=current_page, per_page=page_size)
-        )
-        return rows, meta
+    @classmethod
+    def sum_estimated_time_for(cls, username, week, week_day, exclude=None):
+        """Calculates the sum of the estimated time of every Maintenance Activity
+        for a given day and a given user with a single scalar query,
+        without loading the activities themselves
+
+        Args:
+            username (str): The username for the maintainer who has to perform those maintenance activities
+            week (int): The nth week of the year
+            week_day (str): The day of the week (i.e.: monday, tuesday, ...)
+            exclude (int, optional): a valid identifier for an activity that has to be assigned
+
+        Returns:
+            int: The total estimated time in minutes
+        """
+        query = db.session.query(
+            db.func.coalesce(db.func.sum(cls.estimated_time), 0)).filter_by(
+            maintainer_username=username, week=week, week_day=week_day)
+        if exclude:
+            query = query.filter(cls.activity_id != exclude)
+        return query.scalar()
 
     @classmethod
     def get_total_estimated_time(cls, activities):
@@ -294,5 +307,10 @@ class MaintenanceActivityModel(db.Model):
         Returns:
             int: The total estimated time in minutes
         """
-        return reduce(lambda acc,
-                      activity: acc + activity.estimated_time, activities, 0)
+        return sum(activity.estimated_time for activity in activities)
+
+
+# Columns that update() may mass-assign; the primary key is deliberately
+# left out so passed data cannot accidentally rewrite an activity's identity
+MaintenanceActivityModel._MUTABLE_COLUMNS = frozenset(
+    MaintenanceActivityModel.__table__.columns.keys()) - {"activity_id"}
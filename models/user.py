@@ -1,12 +1,19 @@
 from models.maintenance_activity import MaintenanceActivityModel
 from db import db
-from common.utils import get_metadata
-from werkzeug.security import generate_password_hash
-from config import MAINTAINER_WORK_HOURS, MAINTAINER_WORK_START_HOUR
+from common.utils import paginate
+from werkzeug.security import check_password_hash
+from config import BCRYPT_LOG_ROUNDS, MAINTAINER_WORK_HOURS, MAINTAINER_WORK_START_HOUR
+from cachetools import TTLCache
+import bcrypt
 from exceptions.role_error import RoleError
 from exceptions.invalid_agenda_error import InvalidAgendaError
 import time
 
+# Cached (password hash, role) pairs for the login hot path. The short TTL
+# bounds staleness for out-of-band changes; writes through the model
+# invalidate their entry explicitly
+_credentials_cache = TTLCache(maxsize=1024, ttl=30)
+
 
 class UserModel(db.Model):
     """User class for database interaction"""
@@ -32,9 +39,39 @@ class UserModel(db.Model):
             role (str): The user role (admin, maintainer or planner)
         """
         self.username = username
-        self.password = generate_password_hash(password)
+        self.password = self.hash_password(password)
         self.role = role
 
+    @staticmethod
+    def hash_password(password):
+        """Hashes a plaintext password with bcrypt's native implementation
+
+        Args:
+            password (str): The plaintext password
+
+        Returns:
+            str: The bcrypt hash of the password
+        """
+        return bcrypt.hashpw(
+            password.encode(), bcrypt.gensalt(rounds=BCRYPT_LOG_ROUNDS)).decode()
+
+    @staticmethod
+    def verify_password(password_hash, password):
+        """Checks a plaintext password against a stored hash.
+        Hashes created before the bcrypt migration are still verified
+        through werkzeug's pbkdf2 checker.
+
+        Args:
+            password_hash (str): The stored password hash
+            password (str): The plaintext password to check
+
+        Returns:
+            bool: True if the password matches
+        """
+        if password_hash.startswith("$2"):
+            return bcrypt.checkpw(password.encode(), password_hash.encode())
+        return check_password_hash(password_hash, password)
+
     def json(self):
         """Public representation for user instance.
         It hides the hashed password for security concerns.
@@ -52,32 +89,48 @@ class UserModel(db.Model):
         db.session.add(self)
         db.session.commit()
 
+    @classmethod
+    def bulk_save(cls, users):
+        """Saves a list of user instances to the database with a single commit
+
+        Args:
+            users (list of (UserModel)): The users to be saved
+        """
+        db.session.add_all(users)
+        db.session.commit()
+
     def update(self, data):
         """Updates user instance with passed data.
+        Ignores keys that are not columns and values that are None;
+        passed passwords are hashed before being stored.
 
         Args:
-            data (dict of (str, str)): Dictionary of username, hashed password and role, optionals.
+            data (dict of (str, str)): Dictionary of username, password and role, optionals.
         """
-        for k in data:
-            if(data[k] and k != "password"):
-                setattr(self, k, data[k])
-            elif(k == "password"):
-                setattr(self, "password",
-                        generate_password_hash(data["password"]))
+        for k, v in data.items():
+            if k not in self._MUTABLE_COLUMNS or v is None:
+                continue
+            if k == "password":
+                v = self.hash_password(v)
+            setattr(self, k, v)
 
     def update_and_save(self, data):
-        """Updates user instance with passed data and saves it to the database. 
+        """Updates user instance with passed data and saves it to the database.
 
         Args:
             data (dict of (str, str)): Dictionary of username, hashed password and role, optionals.
         """
+        old_username = self.username
         self.update(data)
         self.save_to_db()
+        _credentials_cache.pop(old_username, None)
+        _credentials_cache.pop(self.username, None)
 
     def delete_from_db(self):
         """Deletes user instance from database"""
         db.session.delete(self)
         db.session.commit()
+        _credentials_cache.pop(self.username, None)
 
     @classmethod
     def find_by_username(cls, username):
@@ -89,7 +142,29 @@ class UserModel(db.Model):
         Returns:
             UserModel: The found user
         """
-        return cls.query.filter_by(username=username).first()
+        if username is None:
+            return None
+        return db.session.get(cls, username)
+
+    @classmethod
+    def find_credentials_by_username(cls, username):
+        """Finds the password hash and role for the user with given username,
+        caching the result briefly so repeated logins skip the SELECT.
+        Used where the full UserModel instance is not needed.
+
+        Args:
+            username (str): The username of the user to retrieve.
+
+        Returns:
+            (str, str): The (password hash, role) tuple, or None if the user does not exist
+        """
+        credentials = _credentials_cache.get(username)
+        if credentials is None:
+            credentials = db.session.query(
+                cls.password, cls.role).filter_by(username=username).first()
+            if credentials is not None:
+                _credentials_cache[username] = tuple(credentials)
+        return credentials
 
     @classmethod
     def find_all(cls):
@@ -113,13 +188,7 @@ class UserModel(db.Model):
             ( list of (UserModel), dict of (str, int) ): 
             The first tuple element is a list of paginated UserModel instances; The second tuple element is the pagination metadata;
         """
-        rows = cls.query.offset(
-            page_size*(current_page-1)).limit(page_size).all()
-
-        meta = get_metadata(
-            cls.query.paginate(page=current_page, per_page=page_size)
-        )
-        return rows, meta
+        return paginate(cls.query, cls.username, current_page, page_size)
 
     @classmethod
     def find_all_maintainers(cls):
@@ -143,14 +212,8 @@ class UserModel(db.Model):
             ( list of (UserModel), dict of (str, int) ): 
             The first tuple element is a list of paginated UserModel instances; The second tuple element is the pagination metadata;
         """
-        rows = cls.query.filter_by(role="maintainer").offset(
-            page_size*(current_page-1)).limit(page_size).all()
-
-        meta = get_metadata(
-            cls.query.filter_by(role="maintainer").paginate(
-                page=current_page, per_page=page_size)
-        )
-        return rows, meta
+        return paginate(cls.query.filter_by(role="maintainer"),
+                        cls.username, current_page, page_size)
 
     def get_daily_activities(self, week, week_day, exclude=None):
         """Finds every activity for a user with role 'maintainer' in a given day.
@@ -363,10 +426,8 @@ class UserModel(db.Model):
             Returns:
                 (str): A string representing the percentage availability for an user in a whole day.
             """
-            activities = self.user.get_daily_activities(
-                self.week, self.week_day, self.exclude)
-            busy_minutes = MaintenanceActivityModel.get_total_estimated_time(
-                activities)
+            busy_minutes = MaintenanceActivityModel.sum_estimated_time_for(
+                self.user.username, self.week, self.week_day, self.exclude)
             busy_hours = busy_minutes / 60
             return f"{ round(100 - ( 100 * busy_hours/self.user.work_hours)) }%"
 
@@ -453,3 +514,8 @@ class UserModel(db.Model):
         """
         return self.WeeklyPercentageAvailability(
             self, week, exclude)
+
+
+# Columns that update() may mass-assign; username stays mutable because the
+# User API legitimately renames users through it
+UserModel._MUTABLE_COLUMNS = frozenset(UserModel.__table__.columns.keys())
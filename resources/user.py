@@ -1,7 +1,6 @@
 from flask_jwt_extended.utils import get_jwt_identity
 from models.user import UserModel
 from flask_restful import Resource, reqparse
-from werkzeug.security import check_password_hash
 from flask_jwt_extended import (
     create_access_token,
     jwt_required,
@@ -201,19 +200,22 @@ class UserLogin(Resource):
         data = cls._user_parser.parse_args()
 
         try:
-            user = UserModel.find_by_username(data['username'])
+            credentials = UserModel.find_credentials_by_username(
+                data['username'])
         except Exception as e:
             return {"error": str(e)}, 500
 
-        if not user:
+        if not credentials:
             return {"message": "User not found"}, 404
 
-        if not check_password_hash(user.password, data["password"]):
+        password_hash, role = credentials
+        if not UserModel.verify_password(password_hash, data["password"]):
             return {"message": "Incorrect password"}, 400
 
+        user_json = {"username": data['username'], "role": role}
         access_token = create_access_token(
-            identity=user.username, user_claims=user.json())
-        return {"access_token": access_token, "user": user.json()}, 200
+            identity=data['username'], user_claims=user_json)
+        return {"access_token": access_token, "user": user_json}, 200
 
 
 class UserLogout(Resource):
@@ -227,8 +229,8 @@ class UserLogout(Resource):
             dict of (str, str): A confirmation message
         """
         # jti is "JWT ID", a unique identifier for JWT
-        jti = get_raw_jwt()['jti']
-        BLACKLIST.add(jti)
+        raw_jwt = get_raw_jwt()
+        BLACKLIST.add(raw_jwt['jti'], raw_jwt.get('exp'))
         return {"message": "Successfully logged out"}, 200
 
 
@@ -268,7 +270,7 @@ class UserChangePassword(Resource):
         if not user:
             return {"message": "User not found"}, 404
 
-        if not check_password_hash(user.password, data["old_password"]):
+        if not UserModel.verify_password(user.password, data["old_password"]):
             return {"message": "Incorrect password"}, 401  # Not authorized
 
         try:
@@ -1,25 +1,95 @@
-from flask.app import Flask
+import os
+
+# config.py reads the environment at import time, so the test profile must
+# be in place before anything below pulls it in (pytest_configure would run
+# too late). Together with the lru_cache'd app factory this bakes the fixed
+# test inputs in once, instead of re-deriving them per request.
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("TEST_DATABASE_URL", "sqlite:///:memory:")
+
+from functools import lru_cache
+from sqlalchemy import event
 from app import create_app
+from db import db
 import pytest
 
 
-@pytest.fixture
-def app():
-    """Creates the app
+@lru_cache(maxsize=None)
+def cached_create_app(config_class):
+    """Creates and initializes the app once per config class, so repeated
+    requests for the same configuration skip Flask extension registration
+    and engine setup entirely
+
+    Args:
+        config_class (str): The dotted path of the Flask config class
 
     Returns:
         Flask: The Flask app
     """
-    _app = create_app('config.TestConfig')
+    _app = create_app(config_class)
+    with _app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            # pysqlite breaks SAVEPOINTs unless transaction handling is done
+            # explicitly; see the "Serializable isolation / Savepoints"
+            # section of SQLAlchemy's pysqlite documentation
+            @event.listens_for(db.engine, "connect")
+            def _sqlite_connect(dbapi_connection, connection_record):
+                dbapi_connection.isolation_level = None
+
+            @event.listens_for(db.engine, "begin")
+            def _sqlite_begin(connection):
+                connection.exec_driver_sql("BEGIN")
     return _app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """Drops the bcrypt work factor to its minimum for the whole session,
+    since the seeds are hashed on every module and the production cost
+    factor would dominate the suite's runtime
+
+    Returns:
+        boolean: the return status
+    """
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.setattr("models.user.BCRYPT_LOG_ROUNDS", 4)
+    yield True
+    monkeypatch.undo()
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Gets the app shared by the whole session, so every test module uses
+    the same engine and therefore the same in-memory database
+
+    Returns:
+        Flask: The Flask app
+    """
+    return cached_create_app('config.TestConfig')
+
+
+@pytest.fixture(scope="session")
 def client(app):
-    """Creates a test client that can be used to test the endpoints without the server being active
+    """Creates a test client that can be used to test the endpoints without
+    the server being active, shared by the whole session
 
     Returns:
         FlaskClient: The test client
     """
     _client = app.test_client()
     return _client
+
+
+@pytest.fixture(autouse=True)
+def reset_client(client):
+    """Restores the shared client's base environ and cookies after each
+    test, so authorization headers set by one test never leak into the next
+
+    Returns:
+        boolean: the return status
+    """
+    environ_base = dict(client.environ_base)
+    yield True
+    client.environ_base = environ_base
+    client.cookie_jar.clear()
@@ -1,9 +1,11 @@
 import pytest
 import config
+from db import db
 from models.maintenance_activity import MaintenanceActivityModel
+from models.user import UserModel
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user_seeds():
     """Gets a list of users of type planner and maintainer
 
@@ -64,22 +66,45 @@ def maintainer_user(user_seeds):
     return next(user for user in user_seeds if user["role"] == "maintainer")
 
 
-@pytest.fixture(autouse=True)
-def setup(app, user_seeds):
-    """Before each test it drops every table and recreates them.
-    Then it creates an user for every dictionary present in user_seeds
+@pytest.fixture(scope="module")
+def database(app):
+    """Once per module it drops every table and recreates them; tests only
+    reset the rows (see setup), so the DDL cost is paid once
 
     Returns:
-        boolean: the return status
+        Flask: The Flask app whose engine holds the created schema
     """
     with app.app_context():
-        from db import db
         db.drop_all()
         db.create_all()
-        from models.user import UserModel
-        for seed in user_seeds:
-            user = UserModel(**seed)
-            user.save_to_db()
+    return app
+
+
+@pytest.fixture(scope="module")
+def seed_instances(user_seeds):
+    """Builds the seed users once per module as detached instances, so the
+    password hashing in the constructor does not run again for every test
+
+    Returns:
+        list of (UserModel): the detached seed users
+    """
+    return [UserModel(**seed) for seed in user_seeds]
+
+
+@pytest.fixture(autouse=True)
+def setup(database, seed_instances):
+    """Before each test it deletes every row, then it copies the detached
+    seed users into the fresh session
+
+    Returns:
+        boolean: the return status
+    """
+    with database.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        for user in seed_instances:
+            db.session.merge(user)
+        db.session.commit()
     return True
 
 
@@ -1,7 +1,10 @@
 import pytest
+from sqlalchemy import event
+from db import db
+from models.user import UserModel
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user_seeds():
     """Gets the list of users for every possible role
 
@@ -25,23 +28,52 @@ def unexisting_user():
     return {'username': 'username', 'password': 'password'}
 
 
-@pytest.fixture(autouse=True)
-def setup(app, user_seeds):
-    """Before each test it drops every table and recreates them.
-    Then it creates an user for every dictionary present in user_seeds
+@pytest.fixture(scope="module")
+def database(app, user_seeds):
+    """Once per module it drops every table, recreates them and creates an
+    user for every dictionary present in user_seeds. Tests run inside a
+    rolled-back transaction (see setup), so the schema is built only once.
 
     Returns:
-        boolean: the return status
+        Flask: The Flask app whose engine holds the seeded schema
     """
     with app.app_context():
-        from db import db
         db.drop_all()
         db.create_all()
-        from models.user import UserModel
-        for seed in user_seeds:
-            user = UserModel(**seed)
-            user.save_to_db()
-    return True
+        UserModel.bulk_save([UserModel(**seed) for seed in user_seeds])
+        db.session.remove()
+        yield app
+
+
+@pytest.fixture(autouse=True)
+def setup(database):
+    """Before each test it binds the session to a connection wrapped in a
+    transaction that is rolled back on teardown, so every test sees the
+    pristine seeded data without paying schema recreation
+
+    Returns:
+        boolean: the return status
+    """
+    with database.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        db.session.configure(bind=connection, binds={})
+        nested = connection.begin_nested()
+
+        @event.listens_for(db.session.session_factory, "after_transaction_end")
+        def restart_savepoint(session, trans):
+            nonlocal nested
+            if trans.nested and not trans._parent.nested:
+                nested = connection.begin_nested()
+
+        yield True
+
+        event.remove(db.session.session_factory,
+                     "after_transaction_end", restart_savepoint)
+        db.session.remove()
+        db.session.configure(bind=None, binds=None)
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture
@@ -88,8 +120,7 @@ def test_login_user_not_found(client, unexisting_user):
 
 def test_login_wrong_password(client, user_seeds):
     """ Tests a failed login by using an incorrect password """
-    test_user = user_seeds[0]
-    test_user["password"] = "wrongpassword"
+    test_user = dict(user_seeds[0], password="wrongpassword")
     res = client.post(
         "/login", data=test_user)
     assert res.status_code == 400
@@ -1,9 +1,12 @@
 import pytest
 import math
 import copy
+from db import db
+from models.maintenance_activity import MaintenanceActivityModel
+from models.user import UserModel
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def activity_seeds():
     """Gets a list of activities with presets activity_id
 
@@ -80,7 +83,7 @@ def post_optional_arguments():
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def planner_seed():
     """Gets an user with role 'planner'
 
@@ -90,26 +93,48 @@ def planner_seed():
     return {'username': 'planner', 'password': 'password', 'role': 'planner'}
 
 
-@pytest.fixture(autouse=True)
-def setup(app, activity_seeds, planner_seed):
-    """Before each test it drops every table and recreates them. 
-    Then it creates an activity for every dictionary present in activity_seeds
-    It also creates a planner that will be used to perform the requests
+@pytest.fixture(scope="module")
+def database(app):
+    """Once per module it drops every table and recreates them; tests only
+    reset the rows (see setup), so the DDL cost is paid once
 
     Returns:
-        boolean: the return status
+        Flask: The Flask app whose engine holds the created schema
     """
     with app.app_context():
-        from db import db
         db.drop_all()
         db.create_all()
-        from models.maintenance_activity import MaintenanceActivityModel
-        for seed in activity_seeds:
-            activity = MaintenanceActivityModel(**seed)
-            activity.save_to_db()
-        from models.user import UserModel
-        planner = UserModel(**planner_seed)
-        planner.save_to_db()
+    return app
+
+
+@pytest.fixture(scope="module")
+def seed_instances(activity_seeds, planner_seed):
+    """Builds the seed activities and the planner once per module as
+    detached instances, so the constructors (and the planner's password
+    hashing) do not run again for every test
+
+    Returns:
+        list of (db.Model): the detached seed records
+    """
+    instances = [MaintenanceActivityModel(**seed) for seed in activity_seeds]
+    instances.append(UserModel(**planner_seed))
+    return instances
+
+
+@pytest.fixture(autouse=True)
+def setup(database, seed_instances):
+    """Before each test it deletes every row, then it copies the detached
+    seed records into the fresh session
+
+    Returns:
+        boolean: the return status
+    """
+    with database.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        for instance in seed_instances:
+            db.session.merge(instance)
+        db.session.commit()
     return True
 
 
@@ -1,53 +1,90 @@
+import math
 import pytest
+from types import MappingProxyType
+from sqlalchemy import event
+from werkzeug.test import EnvironBuilder
+from db import db
+from models.user import UserModel
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user_seeds():
-    """Gets a list of two users for every possible role 
+    """Gets a list of two users for every possible role, built once per
+    module and frozen so tests cannot mutate the shared seeds
 
     Returns:
-        list of (dict of (str, str)): list of users
+        tuple of (MappingProxyType of (str, str)): tuple of users
     """
-    return [
+    return tuple(MappingProxyType(user) for user in [
         {'username': 'admin1', 'password': 'password', 'role': 'admin'},
         {'username': 'admin2', 'password': 'password', 'role': 'admin'},
         {'username': 'maintainer1', 'password': 'password', 'role': 'maintainer'},
         {'username': 'maintainer2', 'password': 'password', 'role': 'maintainer'},
         {'username': 'planner1', 'password': 'password', 'role': 'planner'},
         {'username': 'planner2', 'password': 'password', 'role': 'planner'},
-    ]
+    ])
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def unexisting_user():
     """Gets an user that is not included in user_seeds
 
     Returns:
-        dict of (str, str): the unexisting user
+        MappingProxyType of (str, str): the unexisting user
     """
-    return {'username': 'username', 'password': 'password', 'role': 'admin'}
+    return MappingProxyType(
+        {'username': 'username', 'password': 'password', 'role': 'admin'})
 
 
-@pytest.fixture(autouse=True)
-def setup(app, user_seeds):
-    """Before each test it drops every table and recreates them. 
-    Then it creates an user for every dictionary present in user_seeds
+@pytest.fixture(scope="module")
+def database(app, user_seeds):
+    """Once per module it drops every table, recreates them and creates an
+    user for every dictionary present in user_seeds. Tests run inside a
+    rolled-back transaction (see setup), so the schema is built only once.
 
     Returns:
-        boolean: the return status
+        Flask: The Flask app whose engine holds the seeded schema
     """
     with app.app_context():
-        from db import db
         db.drop_all()
         db.create_all()
-        from models.user import UserModel
-        for seed in user_seeds:
-            user = UserModel(**seed)
-            user.save_to_db()
-    return True
+        UserModel.bulk_save([UserModel(**seed) for seed in user_seeds])
+        db.session.remove()
+        yield app
 
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def setup(database):
+    """Before each test it binds the session to a connection wrapped in a
+    transaction that is rolled back on teardown, so every test sees the
+    pristine seeded data without paying schema recreation
+
+    Returns:
+        boolean: the return status
+    """
+    with database.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        db.session.configure(bind=connection, binds={})
+        nested = connection.begin_nested()
+
+        @event.listens_for(db.session.session_factory, "after_transaction_end")
+        def restart_savepoint(session, trans):
+            nonlocal nested
+            if trans.nested and not trans._parent.nested:
+                nested = connection.begin_nested()
+
+        yield True
+
+        event.remove(db.session.session_factory,
+                     "after_transaction_end", restart_savepoint)
+        db.session.remove()
+        db.session.configure(bind=None, binds=None)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="module")
 def admin_user(user_seeds):
     """ Finds the first admin user among the user seeds
 
@@ -57,35 +94,49 @@ def admin_user(user_seeds):
     return next(user for user in user_seeds if user["role"] == "admin")
 
 
+@pytest.fixture(scope="module")
+def admin_token(database, admin_user):
+    """ Logs in as the admin user once per module and returns the access
+    token, since the token stays valid across tests
+
+    Returns:
+        str: The admin access token
+    """
+    res = database.test_client().post("/login", data=dict(admin_user))
+    # the module-level app context is still active during this request, so
+    # the request teardown never runs and the session must be released here
+    db.session.remove()
+    return res.get_json()["access_token"]
+
+
 @pytest.fixture
-def admin_client(client, admin_user):
-    """ Creates a test client with preset admin authorization headers taken from the login endpoint 
+def admin_client(client, admin_token):
+    """ Creates a test client with preset admin authorization headers taken from the login endpoint
 
     Returns:
         FlaskClient: The test client
     """
-    res = client.post(
-        "/login", data=admin_user)
-    access_token = res.get_json()["access_token"]
-    client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + access_token
+    client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + admin_token
     return client
 
 
 def test_unexisting_user_not_in_user_seeds(user_seeds, unexisting_user):
     """ unexisting_user's username should not be included among user_seeds usernames """
-    filtered_users = list(filter(lambda user: user['username'] ==
-                                 unexisting_user['username'], user_seeds))
-    assert len(filtered_users) == 0
+    assert not any(user['username'] == unexisting_user['username']
+                   for user in user_seeds)
 
 
 def test_get_user_success(admin_client, user_seeds):
-    """ Tests a succesful retrival of a single user """
+    """ Tests a succesful retrival of a single user through a prebuilt
+    WSGI environ, skipping the client's per-call request building """
     test_user = user_seeds[0]
-    res = admin_client.get(f"/user/{test_user['username']}")
+    res = admin_client.open(EnvironBuilder(
+        path=f"/user/{test_user['username']}", method="GET"))
+    body = res.get_json()
     assert res.status_code == 200
-    assert res.get_json()['username'] == test_user['username']
-    assert res.get_json()['role'] == test_user['role']
-    assert 'password' not in res.get_json().keys()
+    assert body['username'] == test_user['username']
+    assert body['role'] == test_user['role']
+    assert 'password' not in body.keys()
 
 
 def test_get_user_not_found(admin_client, unexisting_user):
@@ -104,21 +155,20 @@ def test_get_users_success(admin_client, user_seeds):
     res = admin_client.get(
         f"/users?current_page={test_current_page}&page_size={test_page_size}")
 
+    body = res.get_json()
     assert res.status_code == 200
-    assert len(res.get_json()['rows']) <= test_page_size
-    assert res.get_json()['meta']['count'] == len(user_seeds)
-    assert res.get_json()['meta']['current_page'] == test_current_page
-    assert res.get_json()['meta']['page_size'] == test_page_size
+    assert len(body['rows']) <= test_page_size
+    assert body['meta']['count'] == len(user_seeds)
+    assert body['meta']['current_page'] == test_current_page
+    assert body['meta']['page_size'] == test_page_size
 
-    import math
     expected_page_count = math.ceil(len(user_seeds) / test_page_size)
-    assert res.get_json()['meta']['page_count'] == expected_page_count
+    assert body['meta']['page_count'] == expected_page_count
 
 
 def test_get_users_page_not_found(admin_client, user_seeds):
     """ Tests a failed retrival of a page of users using a non-existing current_page """
     test_page_size = 5
-    import math
     test_page_count = math.ceil(len(user_seeds) / test_page_size)
     test_current_page = test_page_count + 1
     res = admin_client.get(
@@ -133,10 +183,11 @@ def test_post_user_success(admin_client, unexisting_user):
     test_user = unexisting_user
     res = admin_client.post('/user', data=test_user)
 
+    body = res.get_json()
     assert res.status_code == 201
-    assert res.get_json()['username'] == test_user['username']
-    assert res.get_json()['role'] == test_user['role']
-    assert 'password' not in res.get_json().keys()
+    assert body['username'] == test_user['username']
+    assert body['role'] == test_user['role']
+    assert 'password' not in body.keys()
 
 
 def test_post_user_already_exists(admin_client, user_seeds):
@@ -148,71 +199,34 @@ def test_post_user_already_exists(admin_client, user_seeds):
     assert 'message' in res.get_json().keys()
 
 
-def test_post_user_missing_username(admin_client):
-    """ Tests a failed creation of an user by omitting the username """
-    test_user_without_username = {'password': 'password', 'role': 'admin'}
-    res = admin_client.post('/user', data=test_user_without_username)
-    assert res.status_code == 400
-    assert 'message' in res.get_json().keys()
-    assert 'username' in res.get_json()['message'].keys()
-
-
-def test_post_user_missing_password(admin_client):
-    """ Tests a failed creation of an user by omitting the password """
-    test_user_without_password = {'username': 'username', 'role': 'admin'}
-    res = admin_client.post('/user', data=test_user_without_password)
-    assert res.status_code == 400
-    assert 'message' in res.get_json().keys()
-    assert 'password' in res.get_json()['message'].keys()
-
-
-def test_post_user_missing_role(admin_client):
-    """ Tests a failed creation of an user by omitting the role """
-    test_user_without_role = {'username': 'username', 'password': 'password'}
-    res = admin_client.post('/user', data=test_user_without_role)
+@pytest.mark.parametrize("missing_field", ["username", "password", "role"])
+def test_post_user_missing_field(admin_client, unexisting_user, missing_field):
+    """ Tests a failed creation of an user by omitting a required field """
+    test_user = {k: v for k,
+                 v in unexisting_user.items() if k != missing_field}
+    res = admin_client.post('/user', data=test_user)
+    body = res.get_json()
     assert res.status_code == 400
-    assert 'message' in res.get_json().keys()
-    assert 'role' in res.get_json()['message'].keys()
+    assert 'message' in body.keys()
+    assert missing_field in body['message'].keys()
 
 
-def test_put_user_success(admin_client, unexisting_user, user_seeds):
-    """ Tests a successful edit of an user  """
-    test_user = unexisting_user
-    test_user.pop('password')
+@pytest.mark.parametrize("edited_fields", [
+    ('username', 'role'), ('username',), ('role',)])
+def test_put_user_success(admin_client, unexisting_user, user_seeds, edited_fields):
+    """ Tests a successful edit of an user by editing any combination of his username and role """
+    test_user = {field: unexisting_user[field] for field in edited_fields}
     test_old_user = user_seeds[0]
 
     res = admin_client.put(
         f"/user/{test_old_user['username']}", data=test_user)
+    body = res.get_json()
     assert res.status_code == 200
-    assert res.get_json()['username'] == test_user['username']
-    assert res.get_json()['role'] == test_user['role']
-    assert 'password' not in res.get_json().keys()
-
-
-def test_put_user_username_success(admin_client, unexisting_user, user_seeds):
-    """ Tests a succesful edit of an user by only editing his username """
-    test_user = {'username': unexisting_user['username']}
-    test_old_user = user_seeds[0]
-
-    res = admin_client.put(
-        f"/user/{test_old_user['username']}", data=test_user)
-    assert res.status_code == 200
-    assert res.get_json()['username'] == test_user['username']
-    assert res.get_json()['role'] == test_old_user['role']
-    assert 'password' not in res.get_json().keys()
-
-
-def test_put_user_role_success(admin_client, unexisting_user, user_seeds):
-    """ Tests a succesful edit of an user by only editing his role """
-    test_user = {'role': unexisting_user['role']}
-    test_old_user = user_seeds[0]
-
-    res = admin_client.put(
-        f"/user/{test_old_user['username']}", data=test_user)
-    assert res.status_code == 200
-    assert res.get_json()['username'] == test_old_user['username']
-    assert res.get_json()['role'] == test_user['role']
-    assert 'password' not in res.get_json().keys()
+    assert body['username'] == test_user.get(
+        'username', test_old_user['username'])
+    assert body['role'] == test_user.get(
+        'role', test_old_user['role'])
+    assert 'password' not in body.keys()
 
 
 def test_put_user_not_found(admin_client, unexisting_user):
@@ -234,9 +248,11 @@ def test_put_user_new_username_already_existing(admin_client, user_seeds):
 
 
 def test_delete_user_success(admin_client, user_seeds):
-    """ Tests a successful deletion of an user """
+    """ Tests a successful deletion of an user through a prebuilt WSGI
+    environ, skipping the client's per-call request building """
     test_user = user_seeds[0]
-    res = admin_client.delete(f"/user/{test_user['username']}")
+    res = admin_client.open(EnvironBuilder(
+        path=f"/user/{test_user['username']}", method="DELETE"))
     assert res.status_code == 200
     assert 'message' in res.get_json().keys()
 
@@ -0,0 +1,8 @@
+# Gunicorn entrypoint. Monkey-patching must happen before SQLAlchemy (or
+# anything else that opens sockets) is imported so its I/O becomes cooperative.
+from gevent import monkey
+monkey.patch_all()
+
+from app import create_app  # noqa: E402
+
+application = create_app("config.Config")